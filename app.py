@@ -1,19 +1,43 @@
-from dash import Dash, html, dcc, Input, Output, State, no_update
-import dash
-import time
+from dash import Dash, html, dcc, Input, Output, State, Patch, ctx, no_update
+from flask import request
+import os
 import re
+import functools
+import time
+import ast
 import importlib.util
 from pathlib import Path
 import base64
-import json
+import orjson
 from datetime import datetime
+import plotly.io as pio
 
 # ------------------------
 # App bootstrap
 # ------------------------
+# Dash encodes the layout and every callback response via plotly's JSON
+# encoder; pin the C-based orjson engine instead of PlotlyJSONEncoder.
+pio.json.config.default_engine = "orjson"
+
 app = Dash(__name__)
 server = app.server
 
+
+# Query key _versioned() stamps with the file's mtime. Distinct from the
+# hand-bumped ?v= cache busters, which must not be cached as immutable.
+VERSION_QUERY_KEY = "mtime"
+
+
+@server.after_request
+def _cache_versioned_assets(response):
+    # Versioned static files (see _versioned) change URL when the file
+    # changes, so browsers may keep them indefinitely.
+    if (response.status_code == 200 and VERSION_QUERY_KEY in request.args
+            and request.path.startswith("/assets/static_dash/")):
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 # ------------------------
 # Constants / Defaults
 # ------------------------
@@ -22,11 +46,18 @@ USE_VIDEO_FOR_3D_VIEWER = True
 
 UPLOAD_DIR = Path("assets/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_WEB_PREFIX = "/" + UPLOAD_DIR.as_posix() + "/"
 
-SCAN_EXTS = {
-    ".obj", ".stl", ".ply", ".glb", ".gltf", ".fbx",
-    ".las", ".laz", ".e57", ".xyz", ".ptx", ".pts"
-}
+# Lowercase extensions without the leading dot
+SCAN_EXTS = frozenset({
+    "obj", "stl", "ply", "glb", "gltf", "fbx",
+    "las", "laz", "e57", "xyz", "ptx", "pts",
+})
+
+# Chat commands
+_PLAY_RE = re.compile(r"(?:^|\s)/(?:play|video)(?:\s+(.+))?$", re.IGNORECASE)
+_HIDE_TOKENS = ("/hide", "/stop", "hide video", "stop video")
+_HIDE_RE = re.compile("|".join(map(re.escape, _HIDE_TOKENS)))
 
 
 _EXP_OBJECT_MAP = {
@@ -37,8 +68,13 @@ _EXP_OBJECT_MAP = {
 }
 
 
+# Bounded: the key comes from the client (tab value / active experiment)
+@functools.lru_cache(maxsize=16)
 def get_experiment_paths(exp: str) -> dict:
-    """Return all asset paths for a given experiment (e.g. 'exp1')."""
+    """Return all asset paths for a given experiment (e.g. 'exp1').
+
+    Cached per experiment; callers must treat the returned dict as read-only.
+    """
     return {
         "gen_video": f"/assets/static_dash/generated/{exp}/short.mp4",
         "orig_video": f"/assets/static_dash/mocap/{exp}/input.mov",
@@ -59,34 +95,129 @@ def get_experiment_paths(exp: str) -> dict:
 DEFAULT_PATHS = get_experiment_paths("exp1_v2")
 
 
+def _versioned(url: str) -> str:
+    """Append ?mtime=<mtime> to an /assets URL so a changed file gets a new URL."""
+    try:
+        mtime_ns = os.stat(url.lstrip("/")).st_mtime_ns
+    except OSError:
+        return url
+    return f"{url}?{VERSION_QUERY_KEY}={mtime_ns:x}"
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_image_src(url: str, tick: int) -> str:
+    # One isfile/stat per image per `tick` (second), like _stat_mtime
+    stem, dot, ext = url.rpartition(".")
+    if dot and ext.lower() in ("png", "jpg", "jpeg"):
+        webp = f"{stem}.webp"
+        try:
+            # Same freshness rule as webp_images.py: a .webp older than its
+            # source is stale and must not be served.
+            if os.stat(webp.lstrip("/")).st_mtime >= os.stat(url.lstrip("/")).st_mtime:
+                url = webp
+        except OSError:
+            pass
+    return _versioned(url)
+
+
+def _image_src(url: str) -> str:
+    """Versioned image URL, preferring an up-to-date .webp sibling."""
+    return _resolve_image_src(url, int(time.monotonic()))
+
+
 # ------------------------
 # Helpers
 # ------------------------
-def load_niosh_scores(path: Path, id: int = 0) -> dict:
+_NIOSH_VARS = ("SSPP_L4L5", "LI", "RWL")
+
+
+def _exec_niosh_values(path_str: str) -> dict:
+    spec = importlib.util.spec_from_file_location("niosh_scores", path_str)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return {var: getattr(mod, var) for var in _NIOSH_VARS if hasattr(mod, var)}
+
+
+def _literal_niosh_values(tree: ast.Module) -> dict | None:
+    """The NIOSH variables if the module is nothing but imports, docstrings
+    and literal assignments to plain names; None if it needs executing."""
+    values = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if any((alias.asname or alias.name.partition(".")[0]) in _NIOSH_VARS
+                   for alias in node.names):
+                return None
+            continue
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) \
+                and isinstance(node.value.value, str):
+            continue
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            return None
+        if not all(isinstance(target, ast.Name) for target in targets):
+            return None
+        try:
+            value = ast.literal_eval(node.value)
+        except (ValueError, TypeError, SyntaxError, RecursionError):
+            return None
+        for target in targets:
+            if target.id in _NIOSH_VARS:
+                values[target.id] = value
+    if len(values) < len(_NIOSH_VARS):
+        return None
+    return values
+
+
+@functools.lru_cache(maxsize=16)
+def _read_niosh_values(path_str: str, mtime: float) -> dict:
+    """Read the NIOSH variables from a NIOSH_score.py once per (path, mtime).
+
+    A file of plain literal assignments is parsed with ast rather than
+    executed; anything else (computed values, later mutation, missing
+    names) falls back to executing it.
+    """
+    tree = ast.parse(Path(path_str).read_bytes(), filename=path_str)
+    values = _literal_niosh_values(tree)
+    if values is None:
+        return _exec_niosh_values(path_str)
+    return values
+
+
+@functools.lru_cache(maxsize=32)
+def _niosh_scores_cached(path_str: str, mtime: float, id: int) -> dict:
+    values = _read_niosh_values(path_str, mtime)
+
+    def get_item(var, idx):
+        try:
+            v = values.get(var)
+            if v is None:
+                return None
+            return v[idx] if isinstance(v, (list, tuple)) and len(v) > idx else v
+        except Exception:
+            return values.get(var)
+
+    return {var: get_item(var, id) for var in _NIOSH_VARS}
+
+
+@functools.lru_cache(maxsize=16)
+def _stat_mtime(path_str: str, tick: int) -> float | None:
+    # One stat per path per `tick` (second); None if the file is missing
     try:
-        if not path.exists():
-            return {}
-        spec = importlib.util.spec_from_file_location("niosh_scores", str(path))
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-
-        def get_item(var, idx):
-            try:
-                v = getattr(mod, var, None)
-                if v is None:
-                    return None
-                return v[idx] if isinstance(v, (list, tuple)) and len(v) > idx else v
-            except Exception:
-                return getattr(mod, var, None)
-
-        return {
-            "SSPP_L4L5": get_item("SSPP_L4L5", id),
-            "LI": get_item("LI", id),
-            "RWL": get_item("RWL", id),
-        }
-    except Exception as e:
-        print("[error] Failed to load NIOSH scores:", e)
-        return {}
+        return os.stat(path_str).st_mtime
+    except OSError:
+        return None
+
+
+def _score_file_key(path: Path) -> tuple | None:
+    """(path, mtime) cache key for a score file, or None if it is missing."""
+    path_str = str(path)
+    mtime = _stat_mtime(path_str, int(time.monotonic()))
+    if mtime is None:
+        return None
+    return path_str, mtime
 
 
 def format_niosh_text(scores: dict) -> str:
@@ -128,27 +259,63 @@ def format_niosh_text(scores: dict) -> str:
     return f"{li_str}\n{rwl_str}"
 
 
+@functools.lru_cache(maxsize=32)
+def _niosh_text_cached(path_str: str, mtime: float, id: int) -> str:
+    return format_niosh_text(_niosh_scores_cached(path_str, mtime, id))
+
+
+def load_niosh_text(path: Path, id: int = 0) -> str:
+    """Formatted NIOSH text for a score file, cached until the file changes."""
+    try:
+        key = _score_file_key(path)
+        if key is not None:
+            return _niosh_text_cached(*key, id)
+    except Exception as e:
+        print("[error] Failed to load NIOSH scores:", e)
+    return format_niosh_text({})
+
+
 def is_scan_file(filename: str) -> bool:
-    return Path(filename).suffix.lower() in SCAN_EXTS
+    _, dot, ext = filename.rpartition(".")
+    return bool(dot) and ext.lower() in SCAN_EXTS
+
+
+# Base64 characters decoded per write; a multiple of 4 so every window
+# decodes on its own (48 KiB of raw bytes).
+_B64_WINDOW = 64 * 1024
 
 
 def save_upload_to_disk(contents: str, filename: str) -> str:
-    if not contents or "," not in contents:
+    start = contents.find(",") + 1 if contents else 0
+    if start == 0:
         raise ValueError("Invalid upload contents")
-    header, b64data = contents.split(",", 1)
-    raw = base64.b64decode(b64data)
-    safe = "scan." + filename.split(".")[-1]
+    safe = "scan." + filename.rpartition(".")[2]
     out = UPLOAD_DIR / safe
-    with open(out, "wb") as f:
-        f.write(raw)
-    return "/" + str(out).replace("\\", "/")
+    # Decode the data URL in windows so a large scan is never held in
+    # memory a second time as raw bytes. Write to a temp file so a bad
+    # payload leaves any previously saved scan intact.
+    tmp = out.with_name(out.name + ".tmp")
+    try:
+        with open(tmp, "wb", buffering=1 << 20) as f:
+            for i in range(start, len(contents), _B64_WINDOW):
+                f.write(base64.b64decode(contents[i:i + _B64_WINDOW]))
+        tmp.replace(out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return UPLOAD_WEB_PREFIX + safe
+
+
+@functools.lru_cache(maxsize=32)
+def _encode_task(raw_text: str) -> bytes:
+    stub = {"raw": raw_text, "extracted": "xxxx"}
+    return orjson.dumps(stub, option=orjson.OPT_INDENT_2)
 
 
 def save_task_json(raw_text: str) -> str:
     out = UPLOAD_DIR / "task.json"
-    stub = {"raw": raw_text, "extracted": "xxxx"}
-    out.write_text(json.dumps(stub, indent=2), encoding="utf-8")
-    return "/" + str(out).replace("\\", "/")
+    out.write_bytes(_encode_task(raw_text))
+    return UPLOAD_WEB_PREFIX + out.name
 
 
 def is_motion_safe(scores: dict) -> bool | None:
@@ -165,6 +332,9 @@ def is_motion_safe(scores: dict) -> bool | None:
 PLACEHOLDER_SCAN = "/assets/uploads/scan_thumbnail.png"
 
 
+# Bubbles are pure functions of their (immutable) arguments, so a re-render
+# of an unchanged message reuses the component built the first time.
+@functools.lru_cache(maxsize=4096)
 def bubble(role, kind, content, filename=None, image_src=None, image_label=None):
     if kind == "file":
         inner = html.Div([
@@ -186,6 +356,20 @@ def bubble(role, kind, content, filename=None, image_src=None, image_label=None)
     return html.Div(inner, className=f"msg msg-{role}")
 
 
+def _render_bubbles(messages: list) -> list:
+    return [
+        bubble(
+            role=msg.get("role", "user"),
+            kind=msg.get("kind", "text"),
+            content=msg.get("content", ""),
+            filename=msg.get("filename"),
+            image_src=msg.get("image_src"),
+            image_label=msg.get("image_label"),
+        )
+        for msg in messages
+    ]
+
+
 _PRELOADED_TASK_TEXT = {
     "exp2_v2": "Task description: Lift a 10 lbs. container w/ handle from the floor near position (8.5, 4)",
     "exp3_v2": "Task description: Lift a 3 ft long lumber from the floor near position (8.5, 4)",
@@ -265,12 +449,14 @@ app.layout = html.Div(
     children=[
         # Stores
         dcc.Store(id="show-video", data={"show": False, "src": ""}),
+        # Chat of the tab being shown; only replaced on tab switch
         dcc.Store(id="chat-store", data=[]),
         dcc.Store(id="scan-state", data={"has_scan": False, "path": ""}),
         dcc.Store(id="task-state", data={"has_task": False, "json_path": ""}),
         dcc.Store(id="verdict-state", data={"ready": False, "safe": None}),
         dcc.Store(id="active-experiment", data="exp1_v2"),
         # Per-tab chat memory: {exp1: [...], exp2: [...], ...}
+        # Source of truth for chat history; the chat handlers append to it (_append_chat).
         dcc.Store(id="chat-cache", data={
             "exp1_v2": [],
             "exp2_v2": _get_preloaded_chat("exp2_v2"),
@@ -341,10 +527,10 @@ app.layout = html.Div(
                         html.H4("NIOSH Lifting Equation", className="score-heading"),
                         html.Pre(id="niosh-text-captured", className="score-pre"),
                         html.H4("3D SSPP", className="score-heading"),
-                        html.Img(id="cap-sspp-wide", src=DEFAULT_PATHS["sspp_cap_wide"], className="ssp-back-img"),
+                        html.Img(id="cap-sspp-wide", src=_image_src(DEFAULT_PATHS["sspp_cap_wide"]), className="ssp-back-img"),
                         html.Div(className="ssp-grid", children=[
-                            html.Img(id="cap-sspp-left", src=DEFAULT_PATHS["sspp_cap_left"], className="ssp-img"),
-                            html.Img(id="cap-sspp-right", src=DEFAULT_PATHS["sspp_cap_right"], className="ssp-img"),
+                            html.Img(id="cap-sspp-left", src=_image_src(DEFAULT_PATHS["sspp_cap_left"]), className="ssp-img"),
+                            html.Img(id="cap-sspp-right", src=_image_src(DEFAULT_PATHS["sspp_cap_right"]), className="ssp-img"),
                         ]),
                     ]),
                 ]),
@@ -359,6 +545,10 @@ app.layout = html.Div(
                     dcc.Upload(
                         id="chat-upload",
                         multiple=False,
+                        # Let the browser drop unsupported files before they
+                        # are read and base64-encoded; handle_upload still checks.
+                        accept=",".join("." + ext for ext in sorted(SCAN_EXTS)),
+                        className_reject="upload-reject",
                         children=html.Div([
                             html.Span("\uff0b", className="upload-plus"),
                         ], className="upload-area"),
@@ -391,7 +581,7 @@ app.layout = html.Div(
                                         autoPlay=False,
                                         loop=False,
                                         muted=True,
-                                        preload="auto",
+                                        preload="none",
                                         className="player motion-video",
                                     ),
                                 ],
@@ -430,6 +620,7 @@ _viewer_output_id = "viewport-video" if USE_VIDEO_FOR_3D_VIEWER else "viewport-i
     Output("cap-sspp-wide", "src"),
     Output("niosh-text-captured", "children"),
     Output("player", "src"),
+    Output("player", "preload"),
     Output("gen-sspp-left", "src"),
     Output("gen-sspp-right", "src"),
     Output("gen-sspp-wide", "src"),
@@ -441,141 +632,140 @@ _viewer_output_id = "viewport-video" if USE_VIDEO_FOR_3D_VIEWER else "viewport-i
 def update_all_content(tab_value, verdict_state):
     paths = get_experiment_paths(tab_value)
 
-    # Captured side: always visible
-    cap_scores = load_niosh_scores(paths["score_cap_path"])
-
-    # Viewer source depends on toggle
-    viewer_src = paths["mocap_video"] if USE_VIDEO_FOR_3D_VIEWER else paths["mocap_html"]
+    # A verdict change only affects the generated side; skip re-sending the
+    # captured side, which is unchanged for the current tab.
+    if list(ctx.triggered_prop_ids) == ["verdict-state.data"]:
+        captured = (no_update,) * 6
+        active_exp = no_update
+    else:
+        # Captured side: always visible
+        # Viewer source depends on toggle
+        viewer_src = paths["mocap_video"] if USE_VIDEO_FOR_3D_VIEWER else paths["mocap_html"]
+        captured = (
+            paths["orig_video"],
+            viewer_src,
+            *map(_image_src, (paths["sspp_cap_left"], paths["sspp_cap_right"], paths["sspp_cap_wide"])),
+            load_niosh_text(paths["score_cap_path"]),
+        )
+        active_exp = tab_value
 
     # For scenarios 2-4, always show generated results
     is_preloaded = tab_value in ("exp2_v2", "exp3_v2", "exp4_v2")
 
     if is_preloaded or (verdict_state and verdict_state.get("ready")):
-        gen_scores = load_niosh_scores(paths["score_gen_path"])
         gen_video = paths["gen_video"]
-        gen_sspp = (paths["sspp_gen_left"], paths["sspp_gen_right"], paths["sspp_gen_wide"])
-        niosh_gen = format_niosh_text(gen_scores)
+        gen_sspp = tuple(map(_image_src, (paths["sspp_gen_left"], paths["sspp_gen_right"], paths["sspp_gen_wide"])))
+        niosh_gen = load_niosh_text(paths["score_gen_path"])
     else:
         gen_video = ""
         gen_sspp = ("", "", "")
         niosh_gen = ""
 
     return (
-        paths["orig_video"],
-        viewer_src,
-        paths["sspp_cap_left"], paths["sspp_cap_right"], paths["sspp_cap_wide"],
-        format_niosh_text(cap_scores),
+        *captured,
         gen_video,
+        # Only buffer the generated video once there is one to show
+        "auto" if gen_video else "none",
         *gen_sspp,
         niosh_gen,
-        tab_value,
+        active_exp,
     )
 
 
-# Save current chat to cache when leaving a tab, load cached chat for new tab
-@app.callback(
-    Output("chat-store", "data", allow_duplicate=True),
-    Output("chat-cache", "data"),
+# Load cached chat for the new tab. chat-cache is kept current by the chat
+# handlers, so this is a pure lookup and runs in the browser.
+app.clientside_callback(
+    """
+    function(newTab, cache) {
+        return (cache || {})[newTab] || [];
+    }
+    """,
+    Output("chat-store", "data"),
     Input("experiment-tabs", "value"),
-    State("chat-store", "data"),
     State("chat-cache", "data"),
-    State("active-experiment", "data"),
     prevent_initial_call=True,
 )
-def switch_tab_chat(new_tab, current_chat, cache, prev_tab):
-    # Save current chat to cache under the previous tab
-    cache = cache or {}
-    if prev_tab:
-        cache[prev_tab] = current_chat or []
 
-    # Load cached chat for the new tab
-    new_chat = cache.get(new_tab, [])
 
-    return new_chat, cache
+def _append_chat(active_exp: str, new_msgs: list) -> tuple:
+    """Patches that append messages to the rendered chat and to the active
+    tab's cache, so only the new messages cross the wire."""
+    rendered, cache = Patch(), Patch()
+    rendered.extend(_render_bubbles(new_msgs))
+    cache[active_exp].extend(new_msgs)
+    return rendered, cache
 
 
-# Chat handler
+# Chat handlers: uploads and sends are separate callbacks so each only
+# carries the stores it reads or writes.
+# The verdict itself is set by the chained generate_verdict callback.
 @app.callback(
-    Output("chat-store", "data"),
-    Output("chat-text", "value"),
+    Output("chat-history", "children", allow_duplicate=True),
+    Output("chat-cache", "data", allow_duplicate=True),
     Output("chat-upload", "contents"),
     Output("chat-upload", "filename"),
-    Output("show-video", "data"),
     Output("scan-state", "data"),
-    Output("task-state", "data"),
-    Output("verdict-state", "data"),
-    Output("chat-cache", "data", allow_duplicate=True),
-    Input("chat-send", "n_clicks"),
+    Output("verdict-state", "data", allow_duplicate=True),
     Input("chat-upload", "contents"),
     State("chat-upload", "filename"),
+    State("active-experiment", "data"),
+    prevent_initial_call=True,
+)
+def handle_upload(upload_contents, upload_filename, active_exp):
+    if upload_contents is None:
+        return no_update, no_update, no_update, no_update, no_update, no_update
+
+    active_exp = active_exp or "exp1_v2"
+    new_msgs = [{"role": "user", "kind": "file", "content": "file", "filename": upload_filename}]
+    scan_state, verdict_state = no_update, no_update
+
+    if upload_filename and is_scan_file(upload_filename):
+        try:
+            saved_path = save_upload_to_disk(upload_contents, upload_filename)
+            scan_state = {"has_scan": True, "path": saved_path}
+            verdict_state = {"ready": False, "safe": None}
+            new_msgs.append({"role": "assistant", "kind": "image", "content": "Received 3D scan of site.",
+                             "image_src": PLACEHOLDER_SCAN, "image_label": "3D Site Scan"})
+        except Exception as e:
+            new_msgs = [{"role": "assistant", "kind": "text", "content": f"Failed to save upload: {e}"}]
+    else:
+        accepted = ", ".join("." + ext for ext in sorted(SCAN_EXTS))
+        new_msgs.append({"role": "assistant", "kind": "text",
+                         "content": f"Sorry, I can't process this file type. "
+                                    f"Please upload a 3D scan in one of the following formats: {accepted}"})
+
+    return (*_append_chat(active_exp, new_msgs), None, None, scan_state, verdict_state)
+
+
+@app.callback(
+    Output("chat-history", "children", allow_duplicate=True),
+    Output("chat-cache", "data", allow_duplicate=True),
+    Output("chat-text", "value"),
+    Output("show-video", "data"),
+    Output("task-state", "data"),
+    Output("verdict-state", "data", allow_duplicate=True),
+    Input("chat-send", "n_clicks"),
     State("chat-text", "value"),
-    State("chat-store", "data"),
     State("show-video", "data"),
-    State("scan-state", "data"),
-    State("task-state", "data"),
     State("active-experiment", "data"),
-    State("chat-cache", "data"),
     prevent_initial_call=True,
 )
-def handle_chat(n_clicks, upload_contents, upload_filename, text_value,
-                history, video_state, scan_state, task_state, active_exp, cache):
-    ctx = getattr(dash, "callback_context", None) or getattr(dash, "ctx", None)
-    if not ctx or not ctx.triggered:
-        return no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update
+def handle_send(n_clicks, text_value, video_state, active_exp):
+    user_text = (text_value or "").strip()
+    if user_text == "":
+        return no_update, no_update, no_update, no_update, no_update, no_update
 
-    history = history or []
     video_state = video_state or {"show": False, "src": ""}
-    scan_state = scan_state or {"has_scan": False, "path": ""}
-    task_state = task_state or {"has_task": False, "json_path": ""}
-    cache = cache or {}
-    verdict_state = {"ready": False, "safe": None}
     active_exp = active_exp or "exp1_v2"
     paths = get_experiment_paths(active_exp)
+    new_msgs = [{"role": "user", "kind": "text", "content": user_text}]
+    lowered = user_text.lower()
 
-    def _save_and_return(hist, text_val, upl_c, upl_f, vid, scan, task, verd):
-        """Save chat to cache for the active tab, then return all 9 outputs."""
-        cache[active_exp] = hist if hist is not no_update else (history or [])
-        return hist, text_val, upl_c, upl_f, vid, scan, task, verd, cache
-
-    trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
-
-    # Verdict is now handled by a separate chained callback (generate_verdict)
-    # to allow the loading spinner to show between steps
-
-    if trigger_id == "chat-upload" and upload_contents is not None:
-        if upload_filename and is_scan_file(upload_filename):
-            try:
-                saved_path = save_upload_to_disk(upload_contents, upload_filename)
-                scan_state = {"has_scan": True, "path": saved_path}
-                history.append({"role": "user", "kind": "file", "content": "file", "filename": upload_filename})
-                time.sleep(0.75)
-                history.append({"role": "assistant", "kind": "image", "content": "Received 3D scan of site.",
-                                "image_src": PLACEHOLDER_SCAN, "image_label": "3D Site Scan"})
-                return _save_and_return(history, no_update, None, None, video_state, scan_state, task_state, verdict_state)
-            except Exception as e:
-                history.append({"role": "assistant", "kind": "text", "content": f"Failed to save upload: {e}"})
-                return _save_and_return(history, no_update, None, None, no_update, scan_state, task_state, no_update)
-        else:
-            accepted = ", ".join(sorted(SCAN_EXTS))
-            history.append({"role": "user", "kind": "file", "content": "file", "filename": upload_filename})
-            history.append({"role": "assistant", "kind": "text",
-                            "content": f"Sorry, I can't process this file type. "
-                                       f"Please upload a 3D scan in one of the following formats: {accepted}"})
-            return _save_and_return(history, no_update, None, None, no_update, scan_state, task_state, no_update)
-
-    if trigger_id == "chat-send":
-        user_text = (text_value or "").strip()
-        if user_text == "":
-            return no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update, no_update
-
-        history.append({"role": "user", "kind": "text", "content": user_text})
-        lowered = user_text.lower()
-
-        if lowered.startswith("task description:"):
-            try:
-                json_path = save_task_json(user_text)
-                task_state = {"has_task": True, "json_path": json_path}
-                sample = '''
+    if lowered.startswith("task description:"):
+        try:
+            json_path = save_task_json(user_text)
+            task_state = {"has_task": True, "json_path": json_path}
+            sample = '''
 {
 "task":                "lift",
 "weight_kg":      9.07,
@@ -584,110 +774,78 @@ def handle_chat(n_clicks, upload_contents, upload_filename, text_value,
 "object_type":   "container",
 }
 '''
-                time.sleep(0.75)
-                history.append({
-                    "role": "assistant", "kind": "text",
-                    "content": f"Extracted task parameters: {sample}Saved to {json_path}"
-                })
-                # Show object model thumbnail
-                exp_paths = get_experiment_paths(active_exp or "exp1_v2")
-                history.append({
-                    "role": "assistant", "kind": "image", "content": "",
-                    "image_src": exp_paths["object_thumbnail"], "image_label": "Object Model"
-                })
-                return _save_and_return(history, "", no_update, no_update, video_state, scan_state, task_state, verdict_state)
-            except Exception as e:
-                history.append({"role": "assistant", "kind": "text",
-                                "content": f"Could not save task description: {e}"})
-                return _save_and_return(history, "", no_update, no_update, no_update, scan_state, task_state, no_update)
-
-        if "lower weight" in lowered:
-            history.append({
+            new_msgs.append({
                 "role": "assistant", "kind": "text",
-                "content": "What-if experiment: **lower weight**.\n"
-                           "Simulating reduced load in NIOSH and 3D SSPP\u2026 (placeholder output)."
+                "content": f"Extracted task parameters: {sample}Saved to {json_path}"
             })
-            return _save_and_return(history, "", no_update, no_update, no_update, scan_state, task_state, no_update)
-
-        m = re.search(r"(?:^|\s)/(?:play|video)(?:\s+(.+))?$", user_text, flags=re.IGNORECASE)
-        if m:
-            candidate = (m.group(1) or "").strip()
-            if candidate == "":
-                src = paths["gen_video"]
-            elif candidate.startswith("/assets/"):
-                src = candidate
-            elif candidate.startswith("assets/"):
-                src = "/" + candidate
-            else:
-                src = f"/assets/static_dash/mocap/{active_exp}/{candidate}"
-            video_state = {"show": True, "src": src}
-            bot_reply = f"Playing: {src}"
-        elif any(k in lowered for k in ("/hide", "/stop", "hide video", "stop video")):
-            video_state = {"show": False, "src": video_state.get("src", "")}
-            bot_reply = "Video hidden."
-        elif "increase height" in lowered:
-            bot_reply = "What-if experiment: **increase height** \u2014 not implemented."
+            # Show object model thumbnail
+            new_msgs.append({
+                "role": "assistant", "kind": "image", "content": "",
+                "image_src": paths["object_thumbnail"], "image_label": "Object Model"
+            })
+            return (*_append_chat(active_exp, new_msgs), "", no_update, task_state,
+                    {"ready": False, "safe": None})
+        except Exception as e:
+            new_msgs.append({"role": "assistant", "kind": "text",
+                             "content": f"Could not save task description: {e}"})
+            return (*_append_chat(active_exp, new_msgs), "", no_update, no_update, no_update)
+
+    if "lower weight" in lowered:
+        new_msgs.append({
+            "role": "assistant", "kind": "text",
+            "content": "What-if experiment: **lower weight**.\n"
+                       "Simulating reduced load in NIOSH and 3D SSPP\u2026 (placeholder output)."
+        })
+        return (*_append_chat(active_exp, new_msgs), "", no_update, no_update, no_update)
+
+    m = _PLAY_RE.search(user_text)
+    if m:
+        candidate = (m.group(1) or "").strip()
+        if candidate == "":
+            src = paths["gen_video"]
+        elif candidate.startswith("/assets/"):
+            src = candidate
+        elif candidate.startswith("assets/"):
+            src = "/" + candidate
         else:
-            bot_reply = "\u2026"
-        history.append({"role": "assistant", "kind": "text", "content": bot_reply})
-        return _save_and_return(history, "", no_update, no_update, video_state, scan_state, task_state, no_update)
-
-    return _save_and_return(history, no_update, no_update, no_update, no_update, scan_state, task_state, no_update)
-
-
-@app.callback(
-    Output("chat-history", "children"),
-    Input("chat-store", "data")
-)
-def render_history(history):
-    history = history or []
-    return [
-        bubble(
-            role=msg.get("role", "user"),
-            kind=msg.get("kind", "text"),
-            content=msg.get("content", ""),
-            filename=msg.get("filename"),
-            image_src=msg.get("image_src"),
-            image_label=msg.get("image_label"),
-        )
-        for msg in history
-    ]
+            src = f"/assets/static_dash/mocap/{active_exp}/{candidate}"
+        video_state = {"show": True, "src": src}
+        bot_reply = f"Playing: {src}"
+    elif _HIDE_RE.search(lowered):
+        video_state = {"show": False, "src": video_state.get("src", "")}
+        bot_reply = "Video hidden."
+    elif "increase height" in lowered:
+        bot_reply = "What-if experiment: **increase height** \u2014 not implemented."
+    else:
+        bot_reply = "\u2026"
+    new_msgs.append({"role": "assistant", "kind": "text", "content": bot_reply})
+    return (*_append_chat(active_exp, new_msgs), "", video_state, no_update, no_update)
 
 
-# Chained callback: when both scan and task are ready, show spinner then set verdict
+# Chained callback: when both scan and task are ready, set verdict.
+# update_all_content reacts to the verdict and sets the generated video src.
 @app.callback(
     Output("verdict-state", "data", allow_duplicate=True),
-    Output("video-stage", "children"),
     Input("scan-state", "data"),
     Input("task-state", "data"),
-    State("active-experiment", "data"),
     prevent_initial_call=True,
 )
-def generate_verdict(scan_state, task_state, active_exp):
+def generate_verdict(scan_state, task_state):
     if not scan_state or not scan_state.get("has_scan"):
-        return no_update, no_update
+        return no_update
     if not task_state or not task_state.get("has_task"):
-        return no_update, no_update
+        return no_update
 
-    active_exp = active_exp or "exp1_v2"
-    paths = get_experiment_paths(active_exp)
+    return {"ready": True, "safe": True}
 
-    # This sleep triggers the dcc.Loading spinner on video-stage
-    time.sleep(1.7)
-
-    # Return the verdict and re-create the video element with the src set
-    verdict = {"ready": True, "safe": True}
-    video_el = html.Video(
-        id="player",
-        src=paths["gen_video"],
-        controls=False,
-        autoPlay=False,
-        loop=False,
-        muted=True,
-        preload="auto",
-        className="player motion-video",
-    )
-    return verdict, video_el
+
+# Full render when the shown tab's chat is swapped in
+@app.callback(
+    Output("chat-history", "children"),
+    Input("chat-store", "data"),
+)
+def render_history(history):
+    return _render_bubbles(history or [])
 
 
 # Auto-scroll chat to bottom whenever messages update
@@ -706,6 +864,36 @@ app.clientside_callback(
 )
 
 
+# Keep a spinner over the generated video until the browser has decoded its
+# first frame, instead of holding a server worker to fake the wait
+app.clientside_callback(
+    """
+    function(src) {
+        var stage = document.getElementById('video-stage');
+        var video = document.getElementById('player');
+        if (!stage || !video) return window.dash_clientside.no_update;
+
+        if (!src || video.readyState >= 2) {
+            stage.classList.remove('is-loading');
+            return window.dash_clientside.no_update;
+        }
+
+        stage.classList.add('is-loading');
+        var done = function() {
+            stage.classList.remove('is-loading');
+            video.removeEventListener('loadeddata', done);
+            video.removeEventListener('error', done);
+        };
+        video.addEventListener('loadeddata', done);
+        video.addEventListener('error', done);
+        return window.dash_clientside.no_update;
+    }
+    """,
+    Output("video-stage", "id"),
+    Input("player", "src"),
+)
+
+
 # For scenarios 2-4: pause generated video, play it after mocap video ends
 app.clientside_callback(
     """
@@ -747,7 +935,16 @@ app.clientside_callback(
 )
 
 
+def warm_caches():
+    """Parse every scenario's NIOSH files before the first request needs them."""
+    for exp in ("exp1_v2", "exp2_v2", "exp3_v2", "exp4_v2"):
+        paths = get_experiment_paths(exp)
+        load_niosh_text(paths["score_cap_path"])
+        load_niosh_text(paths["score_gen_path"])
+
+
 if __name__ == "__main__":
+    warm_caches()
     app.run(debug=False)
 """
 Task description: Lift a 20lbs. container from the floor near position (8.5, 4)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Remux dashboard videos so the MP4/MOV index (moov atom) sits at the start of
+# the file. Browsers can then begin playback after the first bytes arrive
+# instead of downloading the whole file first. Streams are copied, not
+# re-encoded, so this is fast and lossless.
+#
+# Usage:
+#   python faststart_videos.py [--root assets/static_dash] [--dry-run]
+#
+# Requires ffmpeg on PATH.
+
+import argparse
+import shutil
+import subprocess
+from pathlib import Path
+
+VIDEO_EXTS = (".mp4", ".mov", ".m4v")
+
+
+def find_videos(root: Path):
+  return sorted(
+    p for p in root.rglob("*")
+    if p.suffix.lower() in VIDEO_EXTS and not p.stem.endswith(".faststart")
+  )
+
+
+def remux_faststart(ffmpeg: str, path: Path) -> None:
+  tmp = path.with_name(path.stem + ".faststart" + path.suffix)
+  subprocess.run(
+    [ffmpeg, "-y", "-loglevel", "error", "-i", str(path),
+     "-c", "copy", "-movflags", "+faststart", str(tmp)],
+    check=True,
+  )
+  tmp.replace(path)
+
+
+def main():
+  ap = argparse.ArgumentParser(description="Move MP4/MOV moov atoms to the front for faster first frame.")
+  ap.add_argument("--root", "-r", default="assets/static_dash", help="Directory to scan recursively (default: assets/static_dash)")
+  ap.add_argument("--dry-run", action="store_true", help="List the videos that would be remuxed")
+  args = ap.parse_args()
+
+  root = Path(args.root)
+  if not root.is_dir():
+    raise SystemExit(f"Directory not found: {root}")
+
+  ffmpeg = shutil.which("ffmpeg")
+  if ffmpeg is None and not args.dry_run:
+    raise SystemExit("ffmpeg not found on PATH.")
+
+  for path in find_videos(root):
+    if args.dry_run:
+      print(f"Would remux: {path}")
+      continue
+    remux_faststart(ffmpeg, path)
+    print(f"Remuxed: {path}")
+
+
+if __name__ == "__main__":
+  main()
@@ -6,6 +6,7 @@
 #
 # Usage:
 #   python patch_ref_motion_render_v2.py --input INPUT.html [--output OUTPUT.html] [--aspect 16:9|1.7777] [--z-up true|false]
+#   python patch_ref_motion_render_v2.py --input-dir DIR [--aspect ...] [--z-up ...]
 #
 # Defaults:
 #   --input  ref_motion_render.html
@@ -14,223 +15,221 @@
 #   --z-up   true
 
 import argparse
+import concurrent.futures
+import functools
+import mmap
+import re
 from pathlib import Path
 
-HEAD_BASE = """
-<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-<style>
-  * { box-sizing: border-box; }
-  html, body { height: 100%; margin: 0; padding: 0; }
-
-  .scenepic-container, .scenepic-root, #sp-main, .viewer, .viewport, .scene-container {
-    height: 100%;
-    margin: 0 !important;
-    padding: 0 !important;
-    display: flex;
-    flex-direction: column;
-    gap: 0;
-    min-height: 420px;
+_HEAD_RE = re.compile(rb"<head\b[^>]*>", re.IGNORECASE)
+_HTML_RE = re.compile(rb"<html\b[^>]*>", re.IGNORECASE)
+_BODY_CLOSE_RE = re.compile(rb"</body\s*>", re.IGNORECASE)
+_NUM = r"\+?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?"
+_ASPECT_RE = re.compile(rf"\s*(?:(?P<a>{_NUM})\s*(?::\s*(?P<b>{_NUM}))?)?\s*$")
+_SUB_RE = re.compile(rb"__(CANVAS_DIMENSIONS|VIEWER_ASPECT)__")
+_JS_LINE_COMMENT_RE = re.compile(rb"//[^\n]*")
+_WS_RE = re.compile(rb"\s+")
+
+# Collapse the injected scripts to one line each; set False to debug them
+MINIFY = True
+
+# Marks a file as already patched; re-running the tool on it is a no-op
+_SENTINEL = b"<!-- ergodash-html-friendly-v1 -->"
+
+# The injected blocks live in html_patch/ and are only read when a file is
+# actually patched.
+_TEMPLATE_DIR = Path(__file__).resolve().parent / "html_patch"
+
+@functools.lru_cache(maxsize=None)
+def load_template(name: str) -> bytes:
+  return b"\n" + (_TEMPLATE_DIR / name).read_bytes()
+
+@functools.lru_cache(maxsize=None)
+def head_templates() -> tuple:
+  """(with-aspect template, no-aspect head); only the aspect value varies after this."""
+  head = load_template("head.html.tmpl")
+  with_aspect = head.replace(
+    b"__CANVAS_DIMENSIONS__", b"aspect-ratio: var(--viewer-aspect); height: auto !important;")
+  subs = {
+    b"CANVAS_DIMENSIONS": b"height: 100% !important;",
+    b"VIEWER_ASPECT": b'""',  # empty string disables
   }
+  no_aspect = _SUB_RE.sub(lambda m: subs[m.group(1)], head)
+  return with_aspect, no_aspect
 
-  body > :first-child,
-  #sp-main > :first-child,
-  .scenepic-container > :first-child,
-  .viewer > :first-child,
-  .viewport > :first-child { margin-top: 0 !important; }
-  body > :last-child,
-  #sp-main > :last-child,
-  .scenepic-container > :last-child,
-  .viewer > :last-child,
-  .viewport > :last-child { margin-bottom: 0 !important; }
-
-  h1, h2, h3, h4, h5, h6 { margin-top: 0.2rem; margin-bottom: 0.2rem; }
-
-  .controls, .sp-controls, #controls, [class*=\"control\"], [id*=\"control\"] {
-    margin: 0 !important;
-    padding: 2px 0 !important;
-  }
-
-  :root { --viewer-aspect: __VIEWER_ASPECT__; }
-
-  canvas {
-    width: 100% !important;
-    display: block;
-    __CANVAS_DIMENSIONS__
-  }
-</style>
-"""
-
-RESIZE_SCRIPT = """
-<script>
-(function () {
-  function getAspect() {
-    var v = getComputedStyle(document.documentElement).getPropertyValue('--viewer-aspect').trim();
-    if (!v || v === '""') return 0;
-    if (v.includes('/')) {
-      var parts = v.split('/');
-      var a = parseFloat(parts[0]);
-      var b = parseFloat(parts[1] || "1");
-      var r = (b && !isNaN(a) && !isNaN(b)) ? (a / b) : 0;
-      return r || 0;
-    } else {
-      var r = parseFloat(v);
-      return (r && !isNaN(r)) ? r : 0;
-    }
-  }
-
-  function resizeCanvas() {
-    var c = document.querySelector('canvas');
-    if (!c) return;
-    var aspect = getAspect();
-    var parent = c.parentElement || document.body;
-    var w = parent.clientWidth || document.documentElement.clientWidth;
-
-    if (aspect > 0) {
-      var h = Math.round(w / aspect);
-      c.width = w;
-      c.height = h;
-      c.style.width = "100%";
-      c.style.height = "auto";
-    } else {
-      var h = document.documentElement.clientHeight;
-      c.width = w;
-      c.height = h;
-      c.style.width = "100%";
-      c.style.height = "100%";
-    }
-
-    if (window.sp && typeof window.sp.resize === "function") {
-      try { window.sp.resize(); } catch (e) {}
-    }
-    if (window.renderer && window.scene && window.camera && window.renderer.render) {
-      try { window.renderer.render(window.scene, window.camera); } catch(e) {}
-    }
-  }
-  window.addEventListener('load', resizeCanvas);
-  window.addEventListener('resize', resizeCanvas);
-})();
-</script>
-"""
-
-CAMERA_SCRIPT = """
-<script>
-(function fixCameraOnceReady(){
-  var THREE = window.THREE || (window.scenepic && window.scenepic.THREE);
-  if (!THREE) { requestAnimationFrame(fixCameraOnceReady); return; }
-
-  var scene    = window.scene    || (window.sp && window.sp.scene)    || (window._scene);
-  var camera   = window.camera   || (window.sp && window.sp.camera)   || (window._camera);
-  var controls = window.controls || (window.sp && window.sp.controls) || (window._controls);
-
-  if (!scene || !camera) { requestAnimationFrame(fixCameraOnceReady); return; }
-
-  try {
-    __SET_Z_UP__
-    var root = scene;
-    var box  = new THREE.Box3().setFromObject(root);
-    if (box.isEmpty()) return;
-
-    var center = box.getCenter(new THREE.Vector3());
-    var sizeV  = box.getSize(new THREE.Vector3());
-    var diag   = Math.sqrt(sizeV.x*sizeV.x + sizeV.y*sizeV.y + sizeV.z*sizeV.z);
-    var dist   = Math.max(1e-3, diag * 0.8);
-
-    if (controls && controls.target && controls.update) {
-      controls.target.copy(center);
-      controls.screenSpacePanning = true;
-      controls.update();
-    }
-
-    var dir = new THREE.Vector3(1, 1, 0.6).normalize();
-    camera.position.copy(center.clone().add(dir.multiplyScalar(dist)));
-    if (camera.lookAt) camera.lookAt(center);
-
-    if (window.renderer && window.renderer.render) {
-      window.renderer.render(scene, camera);
-    }
-  } catch (e) { /* non-fatal */ }
-})();
-</script>
-"""
-
-def build_head_patch(aspect_ratio: str) -> str:
+def build_head_patch(aspect_ratio: str) -> bytes:
+  with_aspect, no_aspect = head_templates()
   if aspect_ratio:
-      canvas_dims = "aspect-ratio: var(--viewer-aspect); height: auto !important;"
-      aspect_value = aspect_ratio  # e.g., "16/9" or "1.7777"
+      return with_aspect.replace(b"__VIEWER_ASPECT__", aspect_ratio.encode("ascii"))  # e.g., "16/9" or "1.7777"
+  return no_aspect
+
+def minify_script(js: bytes) -> bytes:
+  # Good enough for our own templates: no "//" inside string literals and
+  # every statement ends in ";" or "}", so newlines carry no meaning.
+  if not MINIFY:
+    return js
+  return b"\n" + _WS_RE.sub(b" ", _JS_LINE_COMMENT_RE.sub(b"", js)).strip() + b"\n"
+
+_Z_UP_CODE = {
+  True: b"if (camera && camera.up) { camera.up.set(0, 0, 1); }",
+  False: b"/* leave camera.up as-is */",
+}
+
+@functools.lru_cache(maxsize=None)
+def script_variants() -> dict:
+  """{z_up: resize + camera scripts}, built once for both settings."""
+  resize = minify_script(load_template("resize.html"))
+  camera = minify_script(load_template("camera.html.tmpl"))
+  return {z_up: resize + camera.replace(b"__SET_Z_UP__", code)
+          for z_up, code in _Z_UP_CODE.items()}
+
+@functools.lru_cache(maxsize=8)
+def build_patch_blocks(aspect_ratio: str, z_up: bool) -> tuple:
+  """(head patch, scripts) as bytes; identical for identical CLI options."""
+  return build_head_patch(aspect_ratio), script_variants()[z_up]
+
+def find_head_insert(html: bytes) -> tuple:
+  """(offset, prefix, suffix) for placing the head patch."""
+  m = _HEAD_RE.search(html)
+  if m is not None:
+    return m.end(), b"\n", b""
+  # no <head>, create one after <html>
+  mh = _HTML_RE.search(html)
+  if mh is not None:
+    return mh.end(), b"\n<head>\n", b"\n</head>"
+  # if no <html>, prepend
+  return 0, b"<head>\n", b"\n</head>\n"
+
+def find_body_insert(html: bytes) -> tuple:
+  """(offset, prefix, suffix) for placing the scripts before the last </body>."""
+  m = None
+  for m in _BODY_CLOSE_RE.finditer(html):
+    pass  # keep the last match, like rfind
+  if m is None:
+    return len(html), b"\n", b"\n</body>\n</html>"
+  return m.start(), b"", b""
+
+def patch_html_parts(html_text, aspect_ratio: str, z_up: bool) -> list:
+  """Patched document as a list of byte chunks, in order.
+
+  `html_text` is any bytes-like buffer (bytes or an mmap): the anchors and the
+  inserted text are ASCII, so the document never needs to be decoded.
+  """
+  head_at, head_pre, head_post = find_head_insert(html_text)
+  body_at, body_pre, body_post = find_body_insert(html_text)
+  head_patch, scripts = build_patch_blocks(aspect_ratio, z_up)
+
+  inserts = [(head_at, head_pre, head_patch, head_post),
+             (body_at, body_pre, scripts, body_post)]
+  if body_at < head_at:
+    inserts.reverse()
+
+  # Slice between insertion points; each byte of the document is copied once
+  parts = []
+  prev = 0
+  for at, pre, text, post in inserts:
+    parts += (html_text[prev:at], pre, text, post)
+    prev = at
+  parts.append(html_text[prev:])
+  return parts
+
+def is_patched(html_text) -> bool:
+  return html_text.find(_SENTINEL) != -1
+
+def patch_html_text(html_text: bytes, aspect_ratio: str, z_up: bool) -> bytes:
+  if is_patched(html_text):
+    return html_text
+  return b"".join(patch_html_parts(html_text, aspect_ratio, z_up))
+
+def patch_file(in_path: Path, out_path: Path, aspect_ratio: str, z_up: bool) -> bool:
+  """Write the patched copy of `in_path`; False if it was already patched."""
+  # Search the memory-mapped input rather than reading it onto the heap, and
+  # write through a temp file so --output may be the input file itself.
+  tmp = out_path.with_name(out_path.name + ".tmp")
+  with open(in_path, "rb") as f:
+    try:
+      src = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # empty files cannot be mapped
+      src = b""
+    try:
+      if is_patched(src):
+        return False
+      with open(tmp, "wb") as out:
+        out.writelines(patch_html_parts(src, aspect_ratio, z_up))
+    finally:
+      if isinstance(src, mmap.mmap):
+        src.close()
+  tmp.replace(out_path)
+  return True
+
+def default_output_path(in_path: Path) -> Path:
+  return in_path.with_name(in_path.stem + "_patched.html")
+
+def _patch_one(job: tuple) -> tuple:
+  # Worker for --input-dir; module-level so it can be sent to a process pool
+  in_path, aspect_ratio, z_up = job
+  out_path = default_output_path(in_path)
+  return in_path, out_path, patch_file(in_path, out_path, aspect_ratio, z_up)
+
+def report(in_path: Path, out_path: Path, written: bool) -> None:
+  if written:
+    print(f"Wrote: {out_path}")
   else:
-      canvas_dims = "height: 100% !important;"
-      aspect_value = '""'  # empty string disables
-  return HEAD_BASE.replace("__CANVAS_DIMENSIONS__", canvas_dims).replace("__VIEWER_ASPECT__", aspect_value)
-
-def insert_after_head_open(html: str, insert: str) -> str:
-  idx = html.lower().find("<head")
-  if idx == -1:
-    # no <head>, create one after <html>
-    ih = html.lower().find("<html")
-    if ih != -1:
-      end_tag = html.find(">", ih)
-      if end_tag != -1:
-        return html[:end_tag+1] + "\n<head>\n" + insert + "\n</head>" + html[end_tag+1:]
-    # if no <html>, prepend
-    return "<head>\n" + insert + "\n</head>\n" + html
-  # find end of <head ...>
-  end = html.find(">", idx)
-  if end == -1:
-    return "<head>\n" + insert + "\n</head>\n" + html
-  return html[:end+1] + "\n" + insert + html[end+1:]
-
-def insert_before_body_close(html: str, insert: str) -> str:
-  lower = html.lower()
-  idx = lower.rfind("</body>")
-  if idx == -1:
-    return html + "\n" + insert + "\n</body>\n</html>"
-  return html[:idx] + insert + html[idx:]
-
-def patch_html_text(html_text: str, aspect_ratio: str, z_up: bool) -> str:
-  head_patch = build_head_patch(aspect_ratio)
-  html_text = insert_after_head_open(html_text, head_patch)
-
-  z_code = "if (camera && camera.up) { camera.up.set(0, 0, 1); }" if z_up else "// leave camera.up as-is"
-  scripts = RESIZE_SCRIPT + CAMERA_SCRIPT.replace("__SET_Z_UP__", z_code)
-  html_text = insert_before_body_close(html_text, scripts)
-  return html_text
+    print(f"Already patched, nothing written: {in_path}")
 
+@functools.lru_cache(maxsize=16)
 def parse_aspect(s: str) -> str:
-  s = (s or "").strip()
-  if not s:
+  """"A:B" -> "A/B", "R" -> "R" (as floats), "" -> ""; ValueError if invalid."""
+  m = _ASPECT_RE.match(s or "")
+  if m is None:
+      raise ValueError(f"Invalid --aspect {s!r}. Use A:B or a float.")
+  if m["a"] is None:
       return ""
-  if ":" in s:
-      a, b = s.split(":", 1)
-      a = float(a); b = float(b)
-      if a <= 0 or b <= 0:
-          raise SystemExit("Invalid --aspect. Use A:B with positive numbers.")
-      return f"{a}/{b}"
-  else:
-      r = float(s)
-      if r <= 0:
-          raise SystemExit("Invalid --aspect. Use a positive float.")
-      return str(r)
+  a = float(m["a"])
+  if m["b"] is None:
+      if a <= 0:
+          raise ValueError("Invalid --aspect. Use a positive float.")
+      return str(a)
+  b = float(m["b"])
+  if a <= 0 or b <= 0:
+      raise ValueError("Invalid --aspect. Use A:B with positive numbers.")
+  return f"{a}/{b}"
 
 def main():
   ap = argparse.ArgumentParser(description="Patch 3D HTML viewer for Dash iframe embedding.")
   ap.add_argument("--input", "-i", default="assets/static_dash/mocap/exp1/ref_motion_render_small_hand.html", help="Input HTML path (default: ref_motion_render.html)")
   ap.add_argument("--output", "-o", default=None, help="Output HTML path (default: <input_stem>_patched.html)")
+  ap.add_argument("--input-dir", "-d", default=None, help="Patch every *.html in this directory in parallel, each to <stem>_patched.html (overrides --input)")
   ap.add_argument("--aspect", "-a", default="4:3", help='Aspect ratio to preserve (e.g., "16:9" or "1.7777"). Use empty string "" to disable. Default: 16:9')
   ap.add_argument("--z-up", dest="z_up", default="true", choices=["true", "false"], help="Set camera up-axis to Z-up if three.js is detected (default: true)")
   args = ap.parse_args()
 
-  in_path = Path(args.input)
-  out_path = Path(args.output) if args.output else in_path.with_name(in_path.stem + "_patched.html")
-  aspect_str = parse_aspect(args.aspect) if args.aspect != "" else ""
+  try:
+    aspect_str = parse_aspect(args.aspect)
+  except ValueError as e:
+    raise SystemExit(str(e))
   z_up = (args.z_up.lower() == "true")
 
+  if args.input_dir:
+    if args.output:
+      raise SystemExit("--output cannot be combined with --input-dir.")
+    in_dir = Path(args.input_dir)
+    if not in_dir.is_dir():
+      raise SystemExit(f"Input directory not found: {in_dir}")
+    jobs = [(p, aspect_str, z_up) for p in sorted(in_dir.glob("*.html"))
+            if not p.stem.endswith("_patched")]
+    with concurrent.futures.ProcessPoolExecutor() as ex:
+      for result in ex.map(_patch_one, jobs, chunksize=4):
+        report(*result)
+    return
+
+  in_path = Path(args.input)
+  out_path = Path(args.output) if args.output else default_output_path(in_path)
+
   if not in_path.exists():
       raise SystemExit(f"Input file not found: {in_path}")
 
-  original = in_path.read_text(encoding="utf-8", errors="ignore")
-  patched = patch_html_text(original, aspect_str, z_up)
-  out_path.write_text(patched, encoding="utf-8")
-  print(f"Wrote: {out_path}")
+  report(in_path, out_path, patch_file(in_path, out_path, aspect_str, z_up))
 
 if __name__ == "__main__":
   main()
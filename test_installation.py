@@ -4,36 +4,36 @@ Test script to verify Ergo-dash installation and functionality.
 Run this script to check if all dependencies are installed correctly.
 """
 
+import contextlib
+import importlib.metadata
+import importlib.util
+import io
+import sys
+
+# (module name, distribution name) for each required package
+REQUIRED_PACKAGES = [
+    ("dash", "dash"),
+    ("dash_bootstrap_components", "dash-bootstrap-components"),
+    ("pandas", "pandas"),
+    ("plotly", "plotly"),
+    ("orjson", "orjson"),
+]
+
 def test_imports():
-    """Test that all required packages can be imported."""
+    """Test that all required packages are installed.
+
+    Only locates each package and reads its installed version; the real
+    imports happen in test_app_creation.
+    """
     print("Testing imports...")
-    try:
-        import dash
-        print(f"  ✓ dash ({dash.__version__})")
-    except ImportError as e:
-        print(f"  ✗ dash: {e}")
-        return False
-    
-    try:
-        import dash_bootstrap_components as dbc
-        print(f"  ✓ dash-bootstrap-components ({dbc.__version__})")
-    except ImportError as e:
-        print(f"  ✗ dash-bootstrap-components: {e}")
-        return False
-    
-    try:
-        import pandas as pd
-        print(f"  ✓ pandas ({pd.__version__})")
-    except ImportError as e:
-        print(f"  ✗ pandas: {e}")
-        return False
-    
-    try:
-        import plotly
-        print(f"  ✓ plotly ({plotly.__version__})")
-    except ImportError as e:
-        print(f"  ✗ plotly: {e}")
-        return False
+    for module, dist in REQUIRED_PACKAGES:
+        try:
+            if importlib.util.find_spec(module) is None:
+                raise ImportError(f"No module named '{module}'")
+            print(f"  ✓ {dist} ({importlib.metadata.version(dist)})")
+        except (ImportError, importlib.metadata.PackageNotFoundError) as e:
+            print(f"  ✗ {dist}: {e}")
+            return False
     
     return True
 
@@ -72,6 +72,16 @@ def test_chart_creation():
         print(f"  ✗ Chart creation failed: {e}")
         return False
 
+def run_buffered(test):
+    """Run a test with its output collected, then write it out in one go."""
+    buf = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buf):
+            return test()
+    finally:
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+
 def main():
     """Run all tests."""
     print("=" * 50)
@@ -80,14 +90,14 @@ def main():
     
     all_passed = True
     
-    if not test_imports():
+    if not run_buffered(test_imports):
         all_passed = False
         print("\n⚠ Some imports failed. Run: pip install -r requirements.txt")
     
-    if not test_app_creation():
+    if not run_buffered(test_app_creation):
         all_passed = False
     
-    if not test_chart_creation():
+    if not run_buffered(test_chart_creation):
         all_passed = False
     
     print("\n" + "=" * 50)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Write a .webp copy next to every PNG/JPEG under the dashboard assets. The
+# app serves the .webp sibling when it exists, which is far smaller to
+# transfer and decode than the large 3DSSPP PNG exports. Originals are kept.
+#
+# Usage:
+#   python webp_images.py [--root assets/static_dash] [--quality 80] [--force] [--dry-run]
+#
+# Requires cwebp on PATH.
+
+import argparse
+import shutil
+import subprocess
+from pathlib import Path
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+
+
+def find_images(root: Path, force: bool):
+  for p in sorted(root.rglob("*")):
+    if p.suffix.lower() not in IMAGE_EXTS:
+      continue
+    webp = p.with_suffix(".webp")
+    if force or not webp.exists() or webp.stat().st_mtime < p.stat().st_mtime:
+      yield p, webp
+
+
+def convert(cwebp: str, src: Path, dst: Path, quality: int) -> None:
+  subprocess.run(
+    [cwebp, "-quiet", "-q", str(quality), str(src), "-o", str(dst)],
+    check=True,
+  )
+
+
+def main():
+  ap = argparse.ArgumentParser(description="Create .webp siblings for PNG/JPEG dashboard images.")
+  ap.add_argument("--root", "-r", default="assets/static_dash", help="Directory to scan recursively (default: assets/static_dash)")
+  ap.add_argument("--quality", "-q", type=int, default=80, help="cwebp quality 0-100 (default: 80)")
+  ap.add_argument("--force", action="store_true", help="Reconvert even if an up-to-date .webp exists")
+  ap.add_argument("--dry-run", action="store_true", help="List the images that would be converted")
+  args = ap.parse_args()
+
+  root = Path(args.root)
+  if not root.is_dir():
+    raise SystemExit(f"Directory not found: {root}")
+
+  cwebp = shutil.which("cwebp")
+  if cwebp is None and not args.dry_run:
+    raise SystemExit("cwebp not found on PATH.")
+
+  for src, dst in find_images(root, args.force):
+    if args.dry_run:
+      print(f"Would convert: {src}")
+      continue
+    convert(cwebp, src, dst, args.quality)
+    print(f"Converted: {src} -> {dst.name}")
+
+
+if __name__ == "__main__":
+  main()
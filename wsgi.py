@@ -0,0 +1,5 @@
+"""WSGI entry point, e.g. ``gunicorn -k gthread -w 2 --threads 8 wsgi:server``."""
+
+from app import server, warm_caches
+
+warm_caches()